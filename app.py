@@ -1,7 +1,13 @@
 import os
 import logging
-from flask import Flask, render_template, request, jsonify, send_file
+import functools
+import threading
+import unicodedata
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, render_template, request, jsonify, send_from_directory, make_response
 from flask_cors import CORS
+from werkzeug.exceptions import NotFound
 from video_downloader import VideoDownloader
 import mimetypes
 
@@ -14,6 +20,52 @@ CORS(app)
 
 downloader = VideoDownloader()
 
+# When running behind nginx, set this to the internal location that maps to the
+# downloads directory (e.g. "/protected_downloads/") so nginx serves the bytes
+X_ACCEL_REDIRECT_PREFIX = os.environ.get("X_ACCEL_REDIRECT_PREFIX")
+
+# Let browsers and CDNs reuse downloaded files instead of re-transferring them
+DOWNLOAD_CACHE_MAX_AGE = 3600
+
+# Bounded pool for blocking yt-dlp extraction. EXTRACT_SLOTS caps running plus
+# queued calls (including ones abandoned after a timeout) so a burst of lookups is
+# turned away with a 503 instead of piling up behind the workers.
+EXTRACT_WORKERS = 8
+EXTRACT_QUEUE_SIZE = 16
+EXTRACT_POOL = ThreadPoolExecutor(max_workers=EXTRACT_WORKERS, thread_name_prefix='ytdl')
+EXTRACT_SLOTS = threading.BoundedSemaphore(EXTRACT_WORKERS + EXTRACT_QUEUE_SIZE)
+EXTRACT_TIMEOUT = 30  # seconds
+
+class ExtractionBusyError(Exception):
+    """Raised when every extraction slot is taken"""
+
+def run_extraction(func, *args):
+    """Run a blocking yt-dlp call on EXTRACT_POOL with admission control and a timeout"""
+    if not EXTRACT_SLOTS.acquire(blocking=False):
+        raise ExtractionBusyError()
+    try:
+        future = EXTRACT_POOL.submit(func, *args)
+    except Exception:
+        EXTRACT_SLOTS.release()
+        raise
+    # The slot is held until the call really finishes, even if we stop waiting
+    future.add_done_callback(lambda _: EXTRACT_SLOTS.release())
+    try:
+        return future.result(timeout=EXTRACT_TIMEOUT)
+    except TimeoutError:
+        # Drops the call if it is still queued; a running extraction cannot be interrupted
+        future.cancel()
+        raise
+
+@functools.lru_cache(maxsize=32)
+def _guess_mime(ext):
+    """Resolve the MIME type for a file extension"""
+    if ext == '.mp3':
+        return 'audio/mpeg'
+    if ext == '.mp4':
+        return 'video/mp4'
+    return mimetypes.guess_type('x' + ext)[0] or 'application/octet-stream'
+
 @app.route('/')
 def index():
     """Main page with YouTube downloader interface"""
@@ -34,7 +86,7 @@ def get_video_info():
             return jsonify({'error': 'Please provide a valid YouTube URL. Supported formats: youtube.com/watch, youtu.be, youtube.com/shorts, youtube.com/embed'}), 400
         
         # Get video information
-        video_info = downloader.get_video_info(url)
+        video_info = run_extraction(downloader.get_video_info, url)
         
         if not video_info:
             return jsonify({'error': 'Unable to fetch video information. Please check the URL and try again.'}), 400
@@ -48,10 +100,88 @@ def get_video_info():
             'video_info': video_info
         })
         
+    except TimeoutError:
+        logging.error("Timed out getting video info")
+        return jsonify({'error': 'Fetching video information took too long. Please try again.'}), 504
+    except ExtractionBusyError:
+        logging.warning("Extraction pool is full, rejecting request")
+        return jsonify({'error': 'The server is busy. Please try again in a moment.'}), 503
     except Exception as e:
         logging.error(f"Error getting video info: {str(e)}")
         return jsonify({'error': 'An error occurred while fetching video information. Please try again.'}), 500
 
+@app.route('/get_basic_info', methods=['POST'])
+def get_basic_info():
+    """Get basic video information without the format list"""
+    try:
+        data = request.get_json()
+        url = data.get('url', '').strip()
+        
+        if not url:
+            return jsonify({'error': 'Please provide a valid YouTube URL'}), 400
+        
+        # Validate YouTube URL
+        if not downloader.is_valid_youtube_url(url):
+            return jsonify({'error': 'Please provide a valid YouTube URL. Supported formats: youtube.com/watch, youtu.be, youtube.com/shorts, youtube.com/embed'}), 400
+        
+        video_info = run_extraction(downloader.get_basic_info, url)
+        
+        if not video_info:
+            return jsonify({'error': 'Unable to fetch video information. Please check the URL and try again.'}), 400
+        
+        # Format duration and view count for display
+        video_info['formatted_duration'] = downloader.format_duration(video_info.get('duration', 0))
+        video_info['formatted_views'] = downloader.format_view_count(video_info.get('view_count', 0))
+        
+        return jsonify({
+            'success': True,
+            'video_info': video_info
+        })
+        
+    except TimeoutError:
+        logging.error("Timed out getting basic video info")
+        return jsonify({'error': 'Fetching video information took too long. Please try again.'}), 504
+    except ExtractionBusyError:
+        logging.warning("Extraction pool is full, rejecting request")
+        return jsonify({'error': 'The server is busy. Please try again in a moment.'}), 503
+    except Exception as e:
+        logging.error(f"Error getting basic video info: {str(e)}")
+        return jsonify({'error': 'An error occurred while fetching video information. Please try again.'}), 500
+
+@app.route('/get_formats', methods=['POST'])
+def get_formats():
+    """Get available download formats for a video"""
+    try:
+        data = request.get_json()
+        url = data.get('url', '').strip()
+        
+        if not url:
+            return jsonify({'error': 'Please provide a valid YouTube URL'}), 400
+        
+        # Validate YouTube URL
+        if not downloader.is_valid_youtube_url(url):
+            return jsonify({'error': 'Please provide a valid YouTube URL'}), 400
+        
+        video_info = run_extraction(downloader.get_video_info, url)
+        
+        if not video_info:
+            return jsonify({'error': 'Unable to fetch video formats. Please check the URL and try again.'}), 400
+        
+        return jsonify({
+            'success': True,
+            'formats': video_info['formats']
+        })
+        
+    except TimeoutError:
+        logging.error("Timed out getting video formats")
+        return jsonify({'error': 'Fetching video formats took too long. Please try again.'}), 504
+    except ExtractionBusyError:
+        logging.warning("Extraction pool is full, rejecting request")
+        return jsonify({'error': 'The server is busy. Please try again in a moment.'}), 503
+    except Exception as e:
+        logging.error(f"Error getting video formats: {str(e)}")
+        return jsonify({'error': 'An error occurred while fetching video formats. Please try again.'}), 500
+
 @app.route('/download', methods=['POST'])
 def download_video():
     """Get direct download URL for client-side download"""
@@ -69,7 +199,7 @@ def download_video():
             return jsonify({'error': 'Please provide a valid YouTube URL'}), 400
         
         # Get direct download URL
-        download_result = downloader.get_direct_download_url(url, format_id, download_type)
+        download_result = run_extraction(downloader.get_direct_download_url, url, format_id, download_type)
         
         if download_result['success']:
             return jsonify({
@@ -82,6 +212,12 @@ def download_video():
         else:
             return jsonify({'error': download_result['error']}), 400
         
+    except TimeoutError:
+        logging.error("Timed out getting download URL")
+        return jsonify({'error': 'Preparing the download took too long. Please try again.'}), 504
+    except ExtractionBusyError:
+        logging.warning("Extraction pool is full, rejecting request")
+        return jsonify({'error': 'The server is busy. Please try again in a moment.'}), 503
     except Exception as e:
         logging.error(f"Error getting download URL: {str(e)}")
         return jsonify({'error': 'An error occurred while preparing the download. Please try again.'}), 500
@@ -118,7 +254,7 @@ def server_download():
             # Return success with download URL instead of serving file directly
             return jsonify({
                 'success': True,
-                'download_url': f'/download_file/{filename}',
+                'download_url': f'/download_file/{quote(filename)}',
                 'filename': filename
             })
         else:
@@ -133,32 +269,49 @@ def server_download():
 def download_file(filename):
     """Serve downloaded files with optimized streaming"""
     try:
-        import os
-        file_path = os.path.join(downloader.downloads_dir, filename)
-        
-        if not os.path.exists(file_path):
-            return jsonify({'error': 'File not found'}), 404
+        # Reject path components and hidden files up front; send_from_directory's
+        # safe_join also refuses anything that would escape the downloads directory.
+        # Names are not rewritten, so every file yt-dlp writes stays reachable.
+        if filename.startswith('.') or os.path.basename(filename) != filename:
+            return jsonify({'error': 'Invalid filename'}), 400
         
         # Determine MIME type
-        mime_type, _ = mimetypes.guess_type(file_path)
-        if not mime_type:
-            if filename.endswith('.mp3'):
-                mime_type = 'audio/mpeg'
-            elif filename.endswith('.mp4'):
-                mime_type = 'video/mp4'
-            else:
-                mime_type = 'application/octet-stream'
-        
-        logging.info(f"Serving file: {file_path} ({mime_type})")
-        
-        # Use Flask's optimized send_file for better performance
-        return send_file(
-            file_path,
+        mime_type = _guess_mime(os.path.splitext(filename)[1].lower())
+        
+        logging.info(f"Serving file: {filename} ({mime_type})")
+        
+        # Hand the transfer off to nginx when it sits in front of the app
+        if X_ACCEL_REDIRECT_PREFIX:
+            response = make_response('')
+            response.headers['X-Accel-Redirect'] = X_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + quote(filename)
+            response.headers['Content-Type'] = mime_type
+            # Let werkzeug quote the name; non-ASCII names also get an RFC 5987
+            # filename* parameter, matching what send_file emits
+            try:
+                filename.encode('ascii')
+                names = {'filename': filename}
+            except UnicodeEncodeError:
+                simple = unicodedata.normalize('NFKD', filename).encode('ascii', 'ignore').decode('ascii')
+                names = {'filename': simple, 'filename*': "UTF-8''" + quote(filename, safe="!#$&+-.^_`|~")}
+            response.headers.set('Content-Disposition', 'attachment', **names)
+            response.headers['Cache-Control'] = f'public, max-age={DOWNLOAD_CACHE_MAX_AGE}'
+            return response
+        
+        # send_from_directory does the existence check with a single stat;
+        # conditional responses enable Range requests (206) and 304 revalidation
+        return send_from_directory(
+            downloader.downloads_dir,
+            filename,
             as_attachment=True,
             download_name=filename,
-            mimetype=mime_type
+            mimetype=mime_type,
+            conditional=True,
+            etag=True,
+            max_age=DOWNLOAD_CACHE_MAX_AGE
         )
         
+    except NotFound:
+        return jsonify({'error': 'File not found'}), 404
     except Exception as e:
         logging.error(f"Error serving file: {str(e)}")
         return jsonify({'error': 'File serving error'}), 500
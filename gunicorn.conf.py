@@ -0,0 +1,13 @@
+import os
+import multiprocessing
+
+# Gunicorn configuration - picked up automatically by `gunicorn main:app`
+# All routes block on yt-dlp network I/O, so use cooperative gevent workers
+# instead of sync workers that tie up a whole process per request.
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+worker_class = "gevent"
+workers = int(os.environ.get("GUNICORN_WORKERS", min(multiprocessing.cpu_count() * 2 + 1, 4)))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 1000))
+
+# Downloads and extraction can take a while
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 300))
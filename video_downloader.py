@@ -3,23 +3,131 @@ import yt_dlp
 import re
 import logging
 import time
-from urllib.parse import urlparse, parse_qs
+import threading
+from collections import OrderedDict
+
+# Supported URL forms: youtube.com/watch, youtube.com/shorts, youtube.com/embed, youtu.be
+_YT_RE = re.compile(r'(?i)(?:https?://)?(?:(?:www\.)?youtube\.com/(?:watch\?v=|shorts/|embed/)|youtu\.be/)[A-Za-z0-9_-]{11}(?![\w-])')
+_MAX_URL_LENGTH = 2048
+# YouTube video IDs are always 11 ASCII characters ([A-Za-z0-9_-]); \w alone
+# would also accept Unicode letters
+_ID_RE = re.compile(r'(?i)(?:v=|youtu\.be/|/shorts/|/embed/)([A-Za-z0-9_-]{11})(?![\w-])')
+
+# Formats returned per type - the UI only lists the top few
+MAX_VIDEO_FORMATS = 6
+MAX_AUDIO_FORMATS = 3
+
+# Title sanitization for generated filenames
+_STRIP_RE = re.compile(r'[^\w\s-]')
+_SPACE_RE = re.compile(r'[-\s]+')
+
+# Video metadata cache settings
+INFO_CACHE_SIZE = 256
+INFO_CACHE_TTL = 86400  # 24 hours
+DIRECT_URL_CACHE_TTL = 1800  # Signed media URLs expire, keep these short-lived
+RAW_INFO_CACHE_SIZE = 32  # Unprocessed extractor results are large, keep only a few
+
+
+def _safe_title(title):
+    """Turn a video title into a filesystem-safe name (max 50 chars)"""
+    return _SPACE_RE.sub('_', _STRIP_RE.sub('', title).strip())[:50]
+
+
+class TTLCache:
+    """Thread-safe in-memory LRU cache with per-entry expiry"""
+    
+    def __init__(self, maxsize=INFO_CACHE_SIZE, ttl=INFO_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key, value, expire=None):
+        expires_at = time.monotonic() + (self.ttl if expire is None else expire)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        if entry is None or entry[0] < time.monotonic():
+            return default
+        return entry[1]
+
 
 class VideoDownloader:
     def __init__(self):
         self.downloads_dir = 'downloads'
         os.makedirs(self.downloads_dir, exist_ok=True)
+        # Persistent yt-dlp cache so deciphered player signatures survive restarts
+        self.ytdlp_cache_dir = os.path.join(self.downloads_dir, '.ytdlp-cache')
+        os.makedirs(self.ytdlp_cache_dir, exist_ok=True)
+        self._info_cache = TTLCache()
+        # Raw process=False results from get_basic_info, finished by get_video_info
+        # instead of extracting the same video a second time
+        self._raw_info_cache = TTLCache(maxsize=RAW_INFO_CACHE_SIZE, ttl=DIRECT_URL_CACHE_TTL)
+        
+        # Long-lived yt-dlp instances keep extractor and player-JS state between
+        # requests; YoutubeDL is not safe for concurrent use, so each thread gets its own
+        self._info_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'extract_flat': False,
+            'noplaylist': True,
+            'cachedir': self.ytdlp_cache_dir,
+        }
+        self._audio_opts = {
+            'format': 'bestaudio/best',
+            'quiet': True,
+            'no_warnings': True,
+            'extract_flat': False,
+            'noplaylist': True,
+            'cachedir': self.ytdlp_cache_dir,
+        }
+        self._local = threading.local()
+    
+    def _get_ydl(self, name, opts):
+        """Return this thread's YoutubeDL instance for an option set, creating it on first use"""
+        ydl = getattr(self._local, name, None)
+        if ydl is None:
+            ydl = yt_dlp.YoutubeDL(opts)
+            setattr(self._local, name, ydl)
+        return ydl
+    
+    def _extract_video_id(self, url):
+        """Extract the YouTube video ID used as the cache key"""
+        match = _ID_RE.search(url)
+        return match.group(1) if match else None
+    
+    def _is_cacheable(self, info, video_id):
+        """Only cache results that are the single video the key names"""
+        return bool(video_id) and info.get('_type', 'video') == 'video' and info.get('id') == video_id
     
     def is_valid_youtube_url(self, url):
         """Validate if the URL is a valid YouTube URL"""
-        youtube_patterns = [
-            r'(?:https?://)?(?:www\.)?youtube\.com/watch\?v=[\w-]+',
-            r'(?:https?://)?(?:www\.)?youtube\.com/shorts/[\w-]+',
-            r'(?:https?://)?youtu\.be/[\w-]+',
-            r'(?:https?://)?(?:www\.)?youtube\.com/embed/[\w-]+',
-        ]
+        # Cheap rejects before running the regex
+        if not url or len(url) > _MAX_URL_LENGTH:
+            return False
+        lowered = url.lower()
+        if 'youtube.' not in lowered and 'youtu.be' not in lowered:
+            return False
         
-        return any(re.match(pattern, url, re.IGNORECASE) for pattern in youtube_patterns)
+        return _YT_RE.match(url) is not None
     
     def format_duration(self, duration_seconds):
         """Format duration from seconds to readable format"""
@@ -47,113 +155,171 @@ class VideoDownloader:
         else:
             return f"{view_count:,} views"
     
+    def _summarize_info(self, info):
+        """Pick the display fields out of a yt-dlp info dict"""
+        description = info.get('description') or ''
+        # Extractors that only return a thumbnails list leave picking one to result
+        # processing; the list is not sorted yet, so choose by preference
+        thumbnail = info.get('thumbnail')
+        if not thumbnail and info.get('thumbnails'):
+            thumbnail = max(info['thumbnails'], key=lambda t: t.get('preference') or 0).get('url')
+        return {
+            'title': info.get('title', 'Unknown Title'),
+            'duration': info.get('duration', 0),
+            'uploader': info.get('uploader', 'Unknown'),
+            'view_count': info.get('view_count', 0),
+            'thumbnail': thumbnail or '',
+            'description': description[:200] + '...' if len(description) > 200 else description,
+        }
+    
+    def get_basic_info(self, url):
+        """Get title, duration and thumbnail without yt-dlp's result processing"""
+        video_id = self._extract_video_id(url)
+        if video_id:
+            cached = self._info_cache.get(video_id) or self._info_cache.get((video_id, 'basic'))
+            if cached is not None:
+                return {k: v for k, v in cached.items() if k != 'formats'}
+        
+        try:
+            # process=False still runs the full extractor (format listing and player-JS
+            # work); it only skips process_video_result: format sorting/selection,
+            # thumbnail and subtitle processing, and field sanitization
+            ydl = self._get_ydl('info_ydl', self._info_opts)
+            info = ydl.extract_info(url, download=False, process=False)
+            
+            if not info:
+                return None
+            
+            video_info = self._summarize_info(info)
+            
+            if self._is_cacheable(info, video_id):
+                self._info_cache.set((video_id, 'basic'), video_info)
+                self._raw_info_cache.set(video_id, info)
+            
+            return dict(video_info)
+            
+        except Exception as e:
+            logging.error(f"Error getting basic video info: {str(e)}")
+            return None
+    
     def get_video_info(self, url):
         """Get video information and available formats"""
+        video_id = self._extract_video_id(url)
+        if video_id:
+            cached = self._info_cache.get(video_id)
+            if cached is not None:
+                return dict(cached)
+        
         try:
-            ydl_opts = {
-                'quiet': True,
-                'no_warnings': True,
-                'extract_flat': False,
-            }
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            ydl = self._get_ydl('info_ydl', self._info_opts)
+            # Finish a raw result left by get_basic_info rather than extracting again;
+            # processing mutates it, so it is popped and used only once
+            raw = self._raw_info_cache.pop(video_id) if video_id else None
+            if raw is not None:
+                info = ydl.process_ie_result(raw, download=False)
+            else:
                 info = ydl.extract_info(url, download=False)
+            
+            if not info:
+                return None
+            
+            # Extract video information
+            video_info = self._summarize_info(info)
+            video_info['formats'] = []
+            
+            # Group formats by quality and type, keeping the best-scoring entry
+            # per key as a (score, format) pair so losing entries allocate nothing
+            video_by_key = {}
+            audio_by_key = {}
+            
+            for fmt in info.get('formats', []):
+                get = fmt.get
+                format_id = get('format_id', '')
                 
-                if not info:
-                    return None
-                
-                # Extract video information
-                video_info = {
-                    'title': info.get('title', 'Unknown Title'),
-                    'duration': info.get('duration', 0),
-                    'uploader': info.get('uploader', 'Unknown'),
-                    'view_count': info.get('view_count', 0),
-                    'thumbnail': info.get('thumbnail', ''),
-                    'description': info.get('description', '')[:200] + '...' if info.get('description') else '',
-                    'formats': []
-                }
+                # Skip unusable formats
+                if not format_id or format_id.startswith('sb'):  # Skip storyboard formats
+                    continue
                 
-                # Process available formats
-                formats = info.get('formats', [])
-                processed_formats = {}
+                height = get('height', 0)
+                ext = get('ext', 'mp4')
+                vcodec = get('vcodec', 'none')
+                acodec = get('acodec', 'none')
                 
-                # Group formats by quality and type
-                for fmt in formats:
-                    format_id = fmt.get('format_id', '')
-                    height = fmt.get('height', 0)
-                    width = fmt.get('width', 0)
-                    ext = fmt.get('ext', 'mp4')
-                    vcodec = fmt.get('vcodec', 'none')
-                    acodec = fmt.get('acodec', 'none')
-                    filesize = fmt.get('filesize', 0) or fmt.get('filesize_approx', 0)
-                    tbr = fmt.get('tbr', 0)
-                    
-                    # Skip unusable formats
-                    if not format_id or format_id.startswith('sb'):  # Skip storyboard formats
-                        continue
-                    
-                    # Determine format type - prioritize combined video+audio formats
-                    if vcodec != 'none' and acodec != 'none' and height and height >= 144:
+                # Determine format type - prioritize combined video+audio formats
+                if vcodec != 'none' and height and height >= 144:
+                    format_type = 'video'
+                    grouped = video_by_key
+                    if acodec != 'none':
                         # Combined video+audio format (preferred)
-                        format_type = 'video'
                         quality = f"{height}p (with audio)"
-                    elif vcodec != 'none' and height and height >= 144:
+                    else:
                         # Video-only format (will need audio merging)
-                        format_type = 'video'
                         quality = f"{height}p"
-                    elif acodec != 'none' and vcodec == 'none':
-                        format_type = 'audio'
-                        abr = fmt.get('abr', 0)
-                        quality = f"Audio {int(abr)}kbps" if abr else f"Audio ({ext.upper()})"
-                    else:
-                        continue
-                    
-                    # Create unique key for deduplication
-                    key = f"{format_type}_{quality}_{ext}"
-                    
-                    # Prefer higher quality/filesize formats
-                    current_score = filesize or (tbr * 1000 if tbr else 0)
-                    existing_score = 0
-                    if key in processed_formats:
-                        existing_score = processed_formats[key].get('filesize', 0) or (processed_formats[key].get('tbr', 0) * 1000)
-                    
-                    if key not in processed_formats or current_score > existing_score:
-                        processed_formats[key] = {
-                            'format_id': format_id,
-                            'quality': quality,
-                            'ext': ext,
-                            'type': format_type,
-                            'filesize': filesize,
-                            'filesize_mb': round(filesize / 1024 / 1024, 1) if filesize else 0,
-                            'tbr': tbr,
-                            'height': height,
-                            'width': width
-                        }
-                
-                # Sort formats
-                video_formats = []
-                audio_formats = []
-                
-                for fmt in processed_formats.values():
-                    if fmt['type'] == 'video':
-                        video_formats.append(fmt)
-                    else:
-                        audio_formats.append(fmt)
-                
-                # Sort video formats by quality (highest first) and prioritize combined formats
-                def format_priority(fmt):
-                    # Extract quality number for sorting
-                    quality_num = int(fmt['quality'].split('p')[0]) if 'p' in fmt['quality'] else 0
-                    # Prioritize formats with audio (combined formats)
-                    has_audio = '(with audio)' in fmt['quality']
-                    return (has_audio, quality_num)
-                
-                video_formats.sort(key=format_priority, reverse=True)
+                elif acodec != 'none' and vcodec == 'none':
+                    format_type = 'audio'
+                    grouped = audio_by_key
+                    abr = get('abr', 0)
+                    quality = f"Audio {int(abr)}kbps" if abr else f"Audio ({ext.upper()})"
+                else:
+                    continue
                 
-                video_info['formats'] = video_formats + audio_formats
+                # Prefer higher quality/filesize formats
+                filesize = get('filesize', 0) or get('filesize_approx', 0)
+                tbr = get('tbr', 0)
+                score = filesize or (tbr * 1000 if tbr else 0)
                 
-                return video_info
+                format_key = (quality, ext)
+                existing = grouped.get(format_key)
+                if existing is None or score > existing[0]:
+                    grouped[format_key] = (score, {
+                        'format_id': format_id,
+                        'quality': quality,
+                        'ext': ext,
+                        'type': format_type,
+                        'filesize': filesize,
+                        'filesize_mb': round(filesize / 1024 / 1024, 1) if filesize else 0,
+                        'tbr': tbr,
+                        'height': height,
+                        'width': get('width', 0),
+                        'has_audio': format_type == 'video' and acodec != 'none'
+                    })
+            
+            video_formats = [fmt for _, fmt in video_by_key.values()]
+            audio_formats = [fmt for _, fmt in audio_by_key.values()]
+            
+            # Sort video formats by quality (highest first), prioritize combined formats,
+            # then prefer mp4 among containers of the same height
+            video_formats.sort(key=lambda f: (f['has_audio'], f['height'], f['ext'] == 'mp4'), reverse=True)
+            # Sort audio formats by bitrate (highest first)
+            audio_formats.sort(key=lambda f: f['tbr'] or 0, reverse=True)
+            
+            # Keep one entry per height so the cut spans the quality range
+            # instead of several containers of the top resolutions
+            top_video_formats = []
+            seen_heights = set()
+            for fmt in video_formats:
+                if fmt['height'] in seen_heights:
+                    continue
+                seen_heights.add(fmt['height'])
+                top_video_formats.append(fmt)
+                if len(top_video_formats) == MAX_VIDEO_FORMATS:
+                    break
+            
+            video_info['formats'] = top_video_formats + audio_formats[:MAX_AUDIO_FORMATS]
+            
+            if self._is_cacheable(info, video_id):
+                self._info_cache.set(video_id, video_info)
                 
+                # The same extraction already carries the audio stream URLs, so cache the
+                # direct download result now and the later /download click is a cache hit.
+                # The cache is per process: with several gunicorn workers, /download only
+                # hits it when it lands on the worker that served this lookup.
+                direct_audio = self._build_direct_audio(info)
+                if direct_audio['success']:
+                    self._info_cache.set((video_id, 'direct_audio'), direct_audio, expire=DIRECT_URL_CACHE_TTL)
+            
+            return dict(video_info)
+            
         except Exception as e:
             logging.error(f"Error getting video info: {str(e)}")
             return None
@@ -161,9 +327,14 @@ class VideoDownloader:
     def download_video(self, url, format_id, download_type='video', progress_callback=None):
         """Download video with specified format"""
         try:
+            # Final output path reported by yt-dlp hooks
+            result_holder = {}
+            
             # Create progress hook
             def progress_hook(d):
-                if progress_callback and d['status'] == 'downloading':
+                if d['status'] == 'finished':
+                    result_holder['filename'] = d.get('info_dict', {}).get('_filename') or d.get('filename')
+                elif progress_callback and d['status'] == 'downloading':
                     total = d.get('total_bytes', 0) or d.get('total_bytes_estimate', 0)
                     downloaded = d.get('downloaded_bytes', 0)
                     
@@ -171,25 +342,28 @@ class VideoDownloader:
                         percentage = (downloaded / total) * 100
                         progress_callback({'percentage': min(percentage, 99)})
             
-            # Generate safe filename
-            with yt_dlp.YoutubeDL({'quiet': True}) as temp_ydl:
-                info = temp_ydl.extract_info(url, download=False)
-                if info:
-                    title = info.get('title', 'video')
-                    safe_title = re.sub(r'[^\w\s-]', '', title).strip()
-                    safe_title = re.sub(r'[-\s]+', '_', safe_title)[:50]  # Limit length
-                else:
-                    safe_title = 'video'
+            # Merging and audio extraction rename the file after download
+            def postprocessor_hook(d):
+                if d['status'] == 'finished' and d.get('info_dict', {}).get('filepath'):
+                    result_holder['filename'] = d['info_dict']['filepath']
+            
+            # Let yt-dlp build a safe filename from the title in the same extraction pass;
+            # the video ID keeps names unique when restrictfilenames strips a non-Latin title
+            outtmpl = os.path.join(self.downloads_dir, '%(title).50B-%(id)s.%(ext)s')
             
             # Configure yt-dlp options
             if download_type == 'audio':
                 # Audio download with conversion to MP3
                 ydl_opts = {
                     'format': 'bestaudio/best',
-                    'outtmpl': os.path.join(self.downloads_dir, f'{safe_title}.%(ext)s'),
+                    'outtmpl': outtmpl,
+                    'restrictfilenames': True,
                     'progress_hooks': [progress_hook],
+                    'postprocessor_hooks': [postprocessor_hook],
                     'quiet': True,
                     'no_warnings': True,
+                    'noplaylist': True,
+                    'cachedir': self.ytdlp_cache_dir,
                     'postprocessors': [{
                         'key': 'FFmpegExtractAudio',
                         'preferredcodec': 'mp3',
@@ -210,10 +384,14 @@ class VideoDownloader:
                 
                 ydl_opts = {
                     'format': format_selector,
-                    'outtmpl': os.path.join(self.downloads_dir, f'{safe_title}.%(ext)s'),
+                    'outtmpl': outtmpl,
+                    'restrictfilenames': True,
                     'progress_hooks': [progress_hook],
+                    'postprocessor_hooks': [postprocessor_hook],
                     'quiet': True,
                     'no_warnings': True,
+                    'noplaylist': True,
+                    'cachedir': self.ytdlp_cache_dir,
                     'merge_output_format': 'mp4',  # Ensure consistent output format
                     'writesubtitles': False,  # Don't download subtitles
                     'writeautomaticsub': False,  # Don't download auto-generated subtitles
@@ -226,25 +404,9 @@ class VideoDownloader:
                 if progress_callback:
                     progress_callback({'percentage': 100})
                 
-                # Find the downloaded file - look for recent files matching our pattern
-                downloaded_files = []
-                current_time = time.time()
-                
-                for file in os.listdir(self.downloads_dir):
-                    if file == '.gitkeep':
-                        continue
-                    
-                    file_path = os.path.join(self.downloads_dir, file)
-                    if os.path.isfile(file_path):
-                        # Check if file was created recently (within last 2 minutes)
-                        file_age = current_time - os.path.getctime(file_path)
-                        if file_age < 120:  # 2 minutes
-                            downloaded_files.append(file)
-                
-                if downloaded_files:
-                    # Get the most recent file
-                    downloaded_files.sort(key=lambda x: os.path.getctime(os.path.join(self.downloads_dir, x)), reverse=True)
-                    filename = downloaded_files[0]
+                file_path = result_holder.get('filename')
+                if file_path and os.path.isfile(file_path):
+                    filename = os.path.basename(file_path)
                     
                     logging.info(f"Successfully downloaded: {filename}")
                     return {
@@ -253,21 +415,10 @@ class VideoDownloader:
                         'path': os.path.join(self.downloads_dir, filename)
                     }
                 else:
-                    # Check all files if no recent files found
-                    all_files = [f for f in os.listdir(self.downloads_dir) if f != '.gitkeep']
-                    if all_files:
-                        latest_file = max(all_files, key=lambda x: os.path.getctime(os.path.join(self.downloads_dir, x)))
-                        logging.info(f"Found latest file: {latest_file}")
-                        return {
-                            'success': True,
-                            'filename': latest_file,
-                            'path': os.path.join(self.downloads_dir, latest_file)
-                        }
-                    else:
-                        return {
-                            'success': False,
-                            'error': 'No downloaded file found in directory'
-                        }
+                    return {
+                        'success': False,
+                        'error': 'No downloaded file found in directory'
+                    }
                     
         except Exception as e:
             logging.error(f"Download error: {str(e)}")
@@ -276,6 +427,44 @@ class VideoDownloader:
                 'error': f'Download failed: {str(e)}'
             }
     
+    def _build_direct_audio(self, video_info):
+        """Build the direct download result from the best audio-only format"""
+        # Get direct URL from the best audio format
+        requested_format = None
+        formats = video_info.get('formats', [])
+        
+        # Find best audio format
+        for fmt in formats:
+            if fmt.get('acodec', 'none') != 'none' and fmt.get('vcodec', 'none') == 'none':
+                if not requested_format or (fmt.get('abr') or 0) > (requested_format.get('abr') or 0):
+                    requested_format = fmt
+        
+        if not requested_format:
+            return {
+                'success': False,
+                'error': 'No suitable audio format found for download'
+            }
+        
+        # Get the direct URL
+        download_url = requested_format.get('url')
+        if not download_url:
+            return {
+                'success': False,
+                'error': 'Unable to get direct download URL'
+            }
+        
+        # Generate filename
+        title = video_info.get('title', 'audio')
+        filename = f"{_safe_title(title)}.mp3"
+        
+        return {
+            'success': True,
+            'url': download_url,
+            'filename': filename,
+            'filesize': requested_format.get('filesize', 0),
+            'quality': requested_format.get('format_note', 'Unknown')
+        }
+    
     def get_direct_download_url(self, url, format_id, download_type='video'):
         """Get direct download URL without storing files locally"""
         # Direct downloads don't support audio merging reliably
@@ -286,78 +475,44 @@ class VideoDownloader:
                 'error': 'Direct download not supported for videos with audio. Using server download.'
             }
         
+        video_id = self._extract_video_id(url)
+        if video_id:
+            cached = self._info_cache.get((video_id, 'direct_audio'))
+            if cached is not None:
+                return dict(cached)
+        
         try:
-            # Only handle audio downloads directly
-            format_selector = 'bestaudio/best'
+            # Only audio downloads are handled directly
+            # Extract info to get direct URLs
+            ydl = self._get_ydl('audio_ydl', self._audio_opts)
+            info = ydl.extract_info(url, download=False)
             
-            ydl_opts = {
-                'format': format_selector,
-                'quiet': True,
-                'no_warnings': True,
-                'extract_flat': False,
-            }
+            if not info:
+                return {
+                    'success': False,
+                    'error': 'Unable to extract video information'
+                }
             
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                # Extract info to get direct URLs
-                info = ydl.extract_info(url, download=False)
-                
-                if not info:
-                    return {
-                        'success': False,
-                        'error': 'Unable to extract video information'
-                    }
-                
-                # Get the best format URL
-                if 'entries' in info:
-                    # Handle playlists - get first video
-                    video_info = info['entries'][0] if info['entries'] else None
-                else:
-                    video_info = info
-                
-                if not video_info:
-                    return {
-                        'success': False,
-                        'error': 'No video information found'
-                    }
-                
-                # Get direct URL from the best audio format
-                requested_format = None
-                formats = video_info.get('formats', [])
-                
-                # Find best audio format
-                for fmt in formats:
-                    if fmt.get('acodec', 'none') != 'none' and fmt.get('vcodec', 'none') == 'none':
-                        if not requested_format or (fmt.get('abr', 0) > requested_format.get('abr', 0)):
-                            requested_format = fmt
-                
-                if not requested_format:
-                    return {
-                        'success': False,
-                        'error': 'No suitable audio format found for download'
-                    }
-                
-                # Get the direct URL
-                download_url = requested_format.get('url')
-                if not download_url:
-                    return {
-                        'success': False,
-                        'error': 'Unable to get direct download URL'
-                    }
-                
-                # Generate filename
-                title = video_info.get('title', 'audio')
-                safe_title = re.sub(r'[^\w\s-]', '', title).strip()
-                safe_title = re.sub(r'[-\s]+', '_', safe_title)[:50]
-                filename = f"{safe_title}.mp3"
-                
+            # Get the best format URL
+            if 'entries' in info:
+                # Handle playlists - get first video
+                video_info = info['entries'][0] if info['entries'] else None
+            else:
+                video_info = info
+            
+            if not video_info:
                 return {
-                    'success': True,
-                    'url': download_url,
-                    'filename': filename,
-                    'filesize': requested_format.get('filesize', 0),
-                    'quality': requested_format.get('format_note', 'Unknown')
+                    'success': False,
+                    'error': 'No video information found'
                 }
-                
+            
+            result = self._build_direct_audio(video_info)
+            
+            if result['success'] and self._is_cacheable(video_info, video_id):
+                self._info_cache.set((video_id, 'direct_audio'), result, expire=DIRECT_URL_CACHE_TTL)
+            
+            return dict(result)
+            
         except Exception as e:
             logging.error(f"Error getting direct download URL: {str(e)}")
             return {